@@ -3,52 +3,119 @@
 
 import os
 import sys
+import threading
 import time
 import pandas as pd
 from datetime import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
 import dotenv
 dotenv.load_dotenv()
 
+# watchdog is optional; without it the monitor polls every check_interval
+try:
+  from watchdog.events import FileSystemEventHandler
+  from watchdog.observers import Observer
+except ImportError:
+  Observer = None
+
 # Make sure we can import from modules/
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 from modules.ma_strategy import MovingAverageStrategy
+from modules.storage import PRICE_DTYPES, TailingCsvReader
 
+import matplotlib
+matplotlib.use('Agg')  # charts are only saved and sent, never shown
 import matplotlib.pyplot as plt
 
-def generate_signal_plot(df, filepath):
-  df["timestamp"] = pd.to_datetime(df["timestamp"])
+# Signal chart reused across ticks; lines are updated in place
+_FIG = None
+_AX = None
+_LINES = {}
+
+
+def _init_signal_plot():
+  global _FIG, _AX
+  _FIG, _AX = plt.subplots(figsize=(8, 4))
+  _AX.xaxis_date()
+
+  for column, label in [("price", "Price"), ("short_ma", "Short MA"), ("long_ma", "Long MA")]:
+    _LINES[column], = _AX.plot([], [], label=label, linewidth=1)
 
+  _AX.set_title("BTC Price + Moving Averages (Last 24 hours)")
+  _AX.set_xlabel("Time")
+  _AX.set_ylabel("Price ($)")
+  _AX.legend()
+  _AX.grid(True, alpha=0.3, linestyle='--')
+
+
+def generate_signal_plot(df, filepath):
   now = df["timestamp"].iloc[-1]
   start = now - pd.Timedelta(days=1)
-  df = df[df["timestamp"] >= start]
+  # Rows are time-ordered: locate the window start instead of masking every row
+  df = df.iloc[df["timestamp"].searchsorted(start):]
 
   if df.empty:
     return False
 
-  plt.figure(figsize=(8, 4))
+  if _FIG is None:
+    _init_signal_plot()
 
-  plt.plot(df["timestamp"], df["price"], label="Price", linewidth=1)
-  
-  if "short_ma" in df:
-    plt.plot(df["timestamp"], df["short_ma"], label="Short MA", linewidth=1)
-  
-  if "long_ma" in df:
-    plt.plot(df["timestamp"], df["long_ma"], label="Long MA", linewidth=1)
+  for column, line in _LINES.items():
+    if column in df:
+      line.set_data(df["timestamp"], df[column])
+    else:
+      line.set_data([], [])
 
-  plt.title("BTC Price + Moving Averages (Last 24 hours)")
-  plt.xlabel("Time")
-  plt.ylabel("Price ($)")
-  plt.legend()
-  plt.grid(True, alpha=0.3, linestyle='--')
+  _AX.relim()
+  _AX.autoscale_view()
 
-  plt.tight_layout()
-  plt.savefig(filepath)
-  plt.close()
+  _FIG.tight_layout()
+  _FIG.savefig(filepath, dpi=96)
 
   return True
 
+# One keep-alive connection pool for every Telegram call
+TELEGRAM_SESSION = requests.Session()
+TELEGRAM_SESSION.mount('https://api.telegram.org', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+
+def watch_file(csv_file):
+  # Event set whenever csv_file is written; None when watching is unavailable
+  if Observer is None or not os.path.isdir(os.path.dirname(csv_file)):
+    return None
+
+  target = os.path.abspath(csv_file)
+  changed = threading.Event()
+
+  class _Handler(FileSystemEventHandler):
+    def on_modified(self, event):
+      if os.path.abspath(event.src_path) == target:
+        changed.set()
+
+    on_created = on_modified
+
+    def on_moved(self, event):
+      if os.path.abspath(event.dest_path) == target:
+        changed.set()
+
+  observer = Observer()
+  observer.daemon = True
+  observer.schedule(_Handler(), os.path.dirname(target))
+  observer.start()
+  return changed
+
+
+def wait_for_change(changed, timeout):
+  if changed is None:
+    time.sleep(timeout)
+    return
+  # Wake as soon as the recorder writes, with timeout as a fallback poll
+  changed.wait(timeout)
+  changed.clear()
+
+
 def load_telegram_chat_ids():
   ids = os.getenv("TELEGRAM_CHAT_ID", "")
   if not ids:
@@ -58,16 +125,6 @@ def load_telegram_chat_ids():
   return [chat_id.strip() for chat_id in ids.split(",") if chat_id.strip()]
 
 
-def get_latest_signal(df):
-  if df.empty or 'signal' not in df.columns:
-    return None
-  # Get the last non-NaN signal
-  valid_signals = df[df['signal'].notna()]
-  if valid_signals.empty:
-    return None
-  return valid_signals['signal'].iloc[-1]
-
-
 def format_log_message(signal, row):
   timestamp = row['timestamp']
   price = row['price']
@@ -111,7 +168,7 @@ def send_telegram_message(message: str):
       'chat_id': chat_id,
       'text': message
     }
-    requests.post(url, data=payload)
+    TELEGRAM_SESSION.post(url, data=payload, timeout=5)
 
 
 def send_telegram_plot(filepath):
@@ -119,11 +176,14 @@ def send_telegram_plot(filepath):
   url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
   chat_ids = load_telegram_chat_ids()
 
+  # Read the image once and upload the same bytes to every chat
+  with open(filepath, 'rb') as photo:
+    image = photo.read()
+
   for chat_id in chat_ids:
-    with open(filepath, 'rb') as photo:
-      payload = { 'chat_id': chat_id }
-      files = { 'photo': (filepath, photo) }
-      requests.post(url, data=payload, files=files)
+    payload = { 'chat_id': chat_id }
+    files = { 'photo': (filepath, image) }
+    TELEGRAM_SESSION.post(url, data=payload, files=files, timeout=5)
 
 def main():
   csv_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_prices.csv')
@@ -133,11 +193,18 @@ def main():
   long_window = os.getenv('LONG_WINDOW', 200)
   strategy = MovingAverageStrategy(short_window=int(short_window), long_window=int(long_window))
   last_signal = None
+
+  # Last 24h for the plot, plus enough history for the long MA to be filled across it
+  tail_rows = strategy.long_window + 24 * 60
+  reader = TailingCsvReader(csv_file, tail_rows, dtype=PRICE_DTYPES)
+  changed = watch_file(csv_file)
   
   print("=" * 80)
   print("Live Signal Monitor Started")
   print(f"Monitoring: {csv_file}")
   print(f"Check interval: {check_interval} seconds")
+  if changed is not None:
+    print("Watching for file changes")
   print("=" * 80)
   print()
   
@@ -146,64 +213,57 @@ def main():
       # Check if file exists
       if not os.path.exists(csv_file):
         print(f"[{datetime.now()}] Waiting for data file: {csv_file}")
-        time.sleep(check_interval)
+        wait_for_change(changed, check_interval)
         continue
       
       # Read and process data
       try:
-        df = pd.read_csv(csv_file)
+        # Only rows appended since the previous tick are parsed
+        new_rows = reader.read_new()
+        if reader.restarted:
+          strategy.reset()
         
-        if df.empty:
+        if reader.frame.empty:
           print(f"[{datetime.now()}] No data in file yet...")
-          time.sleep(check_interval)
+          wait_for_change(changed, check_interval)
           continue
         
-        # Ensure timestamp is sorted
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        # Calculate moving averages and generate signals
-        df = strategy.calculate_moving_averages(df)
-        df = strategy.generate_signals(df)
+        if new_rows.empty:
+          # Nothing appended since the last tick, so the signal cannot have changed
+          wait_for_change(changed, check_interval)
+          continue
         
-        # Get the latest signal
-        current_signal = get_latest_signal(df)
+        # Advance the running MAs by the new prices only
+        for price in new_rows['price'].to_numpy():
+          current_signal = strategy.update(price)
         
-        if current_signal is None:
-          print(f"[{datetime.now()}] Waiting for enough data to calculate signals...")
-          time.sleep(check_interval)
-          continue
+        latest_row = {
+          'timestamp': new_rows['timestamp'].iloc[-1],
+          'price': new_rows['price'].iloc[-1],
+          'short_ma': strategy.short_ma,
+          'long_ma': strategy.long_ma,
+        }
         
-        # Check if signal changed to BUY or SELL
-        if current_signal in ['BUY', 'SELL', 'HOLD']:
-          # Get the latest row with signal
-          valid_df = df[df['signal'].notna()]
-          if not valid_df.empty:
-            latest_row = valid_df.iloc[-1]
-            
-            # Only log if this is a new BUY/SELL signal (not the same as last)
-            if current_signal != last_signal:
-              log_message = format_log_message(current_signal, latest_row)
-              print(f"*** {log_message} ***")
-
-              send_telegram_message(log_message)
-
-              plot_filepath = os.path.join(os.path.dirname(__file__), 'charts', 'signal_plot.png')
-              if generate_signal_plot(df, plot_filepath):
-                send_telegram_plot(plot_filepath)
-
-              last_signal = current_signal
-
-        else:
-          # Reset last_signal if we're back to HOLD
-          if last_signal in ['BUY', 'SELL']:
-            last_signal = None
+        # Only log if this is a new signal (not the same as last)
+        if current_signal != last_signal:
+          log_message = format_log_message(current_signal, latest_row)
+          print(f"*** {log_message} ***")
+
+          send_telegram_message(log_message)
+
+          # The chart still needs full MA columns over the plotted window
+          plot_df = strategy.calculate_moving_averages(reader.frame.copy())
+          plot_filepath = os.path.join(os.path.dirname(__file__), 'charts', 'signal_plot.png')
+          if generate_signal_plot(plot_df, plot_filepath):
+            send_telegram_plot(plot_filepath)
+
+          last_signal = current_signal
         
       except Exception as e:
         print(f"[{datetime.now()}] Error processing data: {e}")
       
       # Wait before next check
-      time.sleep(check_interval)
+      wait_for_change(changed, check_interval)
       
   except KeyboardInterrupt:
     print()
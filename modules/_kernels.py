@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+# Codes into ma_strategy.SIGNAL_CATEGORIES (HOLD=0, BUY=1, SELL=2)
+_BUY = 1
+_SELL = 2
+
+def _dual_rolling_mean(prices, short_window, long_window):
+  # Both running window sums in one pass: add the entering price, subtract the leaving one.
+  # float64 throughout, so the averages match pandas rolling().mean() to the cent
+  n = len(prices)
+  short_ma = np.empty(n, dtype=np.float64)
+  long_ma = np.empty(n, dtype=np.float64)
+  short_sum = 0.0
+  long_sum = 0.0
+  for i in range(n):
+    short_sum += prices[i]
+    if i >= short_window:
+      short_sum -= prices[i - short_window]
+    long_sum += prices[i]
+    if i >= long_window:
+      long_sum -= prices[i - long_window]
+    short_ma[i] = short_sum / short_window if i >= short_window - 1 else np.nan
+    long_ma[i] = long_sum / long_window if i >= long_window - 1 else np.nan
+  return short_ma, long_ma
+
+def _ma_signals(prices, short_window, long_window):
+  # One pass over prices: both running sums plus the crossover code per row
+  n = len(prices)
+  short_ma = np.empty(n, dtype=np.float64)
+  long_ma = np.empty(n, dtype=np.float64)
+  codes = np.zeros(n, dtype=np.int8)
+  short_sum = 0.0
+  long_sum = 0.0
+  prev = np.nan
+  for i in range(n):
+    short_sum += prices[i]
+    if i >= short_window:
+      short_sum -= prices[i - short_window]
+    long_sum += prices[i]
+    if i >= long_window:
+      long_sum -= prices[i - long_window]
+    short_avg = short_sum / short_window if i >= short_window - 1 else np.nan
+    long_avg = long_sum / long_window if i >= long_window - 1 else np.nan
+    short_ma[i] = short_avg
+    long_ma[i] = long_avg
+    # Same float64 averages as stored, so this matches ma_strategy._crossover_codes on them
+    diff = short_avg - long_avg
+    if prev < 0 and diff > 0:
+      codes[i] = _BUY
+    elif prev > 0 and diff < 0:
+      codes[i] = _SELL
+    prev = diff
+  return short_ma, long_ma, codes
+
+def _threshold_scan(change, threshold):
+  # One pass over percentage changes: counts beyond +/-threshold and the extremes, skipping NaN
+  n_up = 0
+  n_down = 0
+  cmax = -np.inf
+  cmin = np.inf
+  for v in change:
+    if v != v:
+      continue
+    if v > threshold:
+      n_up += 1
+    elif v < -threshold:
+      n_down += 1
+    if v > cmax:
+      cmax = v
+    if v < cmin:
+      cmin = v
+  return n_up, n_down, cmax, cmin
+
+
+# Ahead-of-time build: `python -m modules._kernels` writes the ma_kernels extension next to
+# this file, so ma_strategy and detector can skip the JIT warm-up on every process start
+if __name__ == '__main__':
+  from numba.pycc import CC
+
+  cc = CC('ma_kernels')
+  cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+  cc.export('dual_rolling_mean', 'UniTuple(f8[::1], 2)(f8[::1], i8, i8)')(_dual_rolling_mean)
+  cc.export('ma_signals', 'Tuple((f8[::1], f8[::1], i1[::1]))(f8[::1], i8, i8)')(_ma_signals)
+  cc.export('threshold_scan', 'Tuple((i8, i8, f8, f8))(f8[::1], f8)')(_threshold_scan)
+  cc.compile()
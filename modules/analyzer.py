@@ -1,7 +1,14 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # the chart is only saved to PNG
 import matplotlib.pyplot as plt
 import os
 
+try:
+    from modules.storage import CSV_ENGINE, PRICE_DTYPES, read_csv_since, read_csv_tail
+except ModuleNotFoundError:
+    from storage import CSV_ENGINE, PRICE_DTYPES, read_csv_since, read_csv_tail
+
 class Analyzer:
     def __init__(self, csv_file='data/btc_prices.csv', output_image='charts/price_chart.png'):
         self.dir_name = os.path.dirname(__file__)
@@ -9,18 +16,26 @@ class Analyzer:
         self.output_image = os.path.join(os.path.dirname(self.dir_name), output_image)
 
     def load_and_plot(self, title='Price History'):
-        df = pd.read_csv(self.csv_file)
-        
-        # Convert timestamp column
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.set_index('timestamp')
-        elif 'datetime' in df.columns:
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df = df.set_index('datetime')
-
         # Get last 24 hours of data
-        df = df.tail(30 * 60)
+        window = pd.Timedelta(hours=24)
+
+        # Pick the timestamp column from the header
+        with open(self.csv_file) as f:
+            header = f.readline().strip().split(',')
+
+        if 'timestamp' in header:
+            # Recorder layout: find the cutoff from the last row, then read only the rows after it
+            df = read_csv_tail(self.csv_file, 1, index_col='timestamp', dtype=PRICE_DTYPES)
+            if not df.empty:
+                df = read_csv_since(self.csv_file, df.index[-1] - window,
+                                    index_col='timestamp', dtype=PRICE_DTYPES)
+            # A header-only file (the recorder's first tick) plots as an empty chart
+        elif 'datetime' in header:
+            # Other layouts may use any timestamp format, so let pandas infer it
+            df = pd.read_csv(self.csv_file, dtype=PRICE_DTYPES, parse_dates=['datetime'],
+                             index_col='datetime').tail(24 * 60)
+        else:
+            df = pd.read_csv(self.csv_file, dtype=PRICE_DTYPES, engine=CSV_ENGINE).tail(24 * 60)
 
         # Create chart
         plt.figure(figsize=(12, 5))
@@ -36,9 +51,7 @@ class Analyzer:
         os.makedirs(os.path.dirname(self.output_image), exist_ok=True)
         plt.savefig(self.output_image, dpi=300, bbox_inches='tight')
         print(f"Chart saved: {self.output_image}")
-        
-        # Show chart
-        plt.show()
+        plt.close('all')
         
         return df
 
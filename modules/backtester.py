@@ -1,21 +1,53 @@
+import numpy as np
+import pandas as pd
+
+try:
+  from modules.ma_strategy import SIGNAL_CATEGORIES
+except ModuleNotFoundError:
+  from ma_strategy import SIGNAL_CATEGORIES
+
+# Trade code per category code; the extra last entry maps unknown/NaN (-1) to HOLD
+_TRADE_CODES = np.array(
+  [{'HOLD': 0, 'BUY': 1, 'SELL': -1}[label] for label in SIGNAL_CATEGORIES] + [0], dtype=np.int8
+)
+
+
+def _encode_signals(signals):
+  # BUY=1, SELL=-1, HOLD=0, computed once at the DataFrame boundary from int8 category codes
+  codes = pd.Categorical(signals, categories=SIGNAL_CATEGORIES).codes
+  return _TRADE_CODES[codes]
+
+
+def _run(signal_codes, prices, cash, position):
+  n = len(signal_codes)
+
+  # Holding after a BUY, flat after a SELL; HOLD rows carry the last state forward
+  last_change = np.maximum.accumulate(np.where(signal_codes != 0, np.arange(n), -1))
+  held = np.where(last_change >= 0, signal_codes[last_change] == 1, position).astype(np.int8)
+
+  # Each entry/exit moves one unit of price in or out of cash
+  trades = np.diff(held, prepend=np.int8(position))
+  cash_values = cash - np.cumsum(trades * prices)
+  return cash_values, held
+
+
 class Backtester:
   def __init__(self, initial_capital=1000000):
     self.initial_capital = initial_capital
     self.position = 0
     self.cash = initial_capital
-    self.portfolio_value = []
+    self.portfolio_value = np.empty(0)
   
   def run_backtest(self, df):
-    for _, row in df.iterrows():
-      if row['signal'] == 'BUY' and self.position == 0:
-        self.position = 1
-        self.cash -= row['price']
-      elif row['signal'] == 'SELL' and self.position == 1:
-        self.position = 0
-        self.cash += row['price']
-      
-      current_value = self.cash + self.position * row['price']
-      self.portfolio_value.append(current_value)
+    signal_codes = _encode_signals(df['signal'])
+    prices = df['price'].to_numpy(dtype=np.float64)
+
+    cash, position = _run(signal_codes, prices, self.cash, self.position)
+    self.portfolio_value = cash + position * prices
+
+    if len(prices):
+      self.position = int(position[-1])
+      self.cash = float(cash[-1])
 
     return self.calculate_performance(df)
   
@@ -31,20 +63,16 @@ class Backtester:
     }
   
   def calculate_max_drawdown(self):
-    max_drawdown = 0.0
-    peak = self.portfolio_value[0]
-    for value in self.portfolio_value:
-      if value > peak:
-        peak = value
-      drawdown = (peak - value) / peak
-      if drawdown > max_drawdown:
-        max_drawdown = drawdown
-    return max_drawdown
+    values = np.asarray(self.portfolio_value, dtype=np.float64)
+    peaks = np.maximum.accumulate(values)
+    return float(((peaks - values) / peaks).max())
   
   def calculate_win_rate(self, df):
-    wins = 0
     total = len(df)
-    for i in range(1, len(df)):
-      if df['signal'].iloc[i] == 'BUY' and df['signal'].iloc[i-1] == 'SELL':
-        wins += 1
+    # Compare int8 category codes instead of Python strings
+    signal = pd.Categorical(df['signal'], categories=SIGNAL_CATEGORIES)
+    codes = signal.codes
+    buy = signal.categories.get_loc('BUY')
+    sell = signal.categories.get_loc('SELL')
+    wins = np.count_nonzero((codes[1:] == buy) & (codes[:-1] == sell))
     return wins / total
\ No newline at end of file
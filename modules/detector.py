@@ -1,48 +1,89 @@
+import numpy as np
 import pandas as pd
 
+try:
+    from modules.storage import PRICE_DTYPES, read_price_csv
+except ModuleNotFoundError:
+    from storage import PRICE_DTYPES, read_price_csv
+
+# Threshold counts and extremes in one pass: the AOT-built extension if present (see
+# modules/_kernels.py), else numba's cached JIT when installed, else NumPy reductions
+try:
+    try:
+        from modules.ma_kernels import threshold_scan as _threshold_scan
+    except ModuleNotFoundError:
+        from ma_kernels import threshold_scan as _threshold_scan
+except ImportError:
+    try:
+        from numba import njit
+        try:
+            from modules._kernels import _threshold_scan
+        except ModuleNotFoundError:
+            from _kernels import _threshold_scan
+        _threshold_scan = njit(cache=True, nogil=True)(_threshold_scan)
+    except ImportError:
+        _threshold_scan = None
+
+# 3-hour volatility buckets, indexed by hour // 3
+TIME_PERIODS = [
+    ['00:00', '03:00'],
+    ['03:00', '06:00'],
+    ['06:00', '09:00'],
+    ['09:00', '12:00'],
+    ['12:00', '15:00'],
+    ['15:00', '18:00'],
+    ['18:00', '21:00'],
+    ['21:00', '23:59'],
+]
+
+# Output prefix per bucket, formatted once
+PERIOD_LABELS = [f"Volatility ({start} - {end})" for start, end in TIME_PERIODS]
+
 def find_pattern(df, jump_threshold=2.0):
     patterns = []
     
-    df = df.copy()
-    df['change'] = df['price'].pct_change() * 100
+    # Percentage change as a bare ndarray; the caller's frame is never copied or widened
+    prices = df['price'].to_numpy()
+    # float64 regardless of the price dtype, matching the AOT threshold_scan signature
+    change = np.empty(len(prices), dtype=np.float64)
+    change[:1] = np.nan
+    change[1:] = (prices[1:] / prices[:-1] - 1.0) * 100
+    
+    if _threshold_scan is not None:
+        n_jumps, n_drops, max_jump, min_drop = _threshold_scan(change, float(jump_threshold))
+    else:
+        # Extremes first (NaN-skipping, no temporaries); a threshold count needs its own
+        # pass only when an extreme actually crosses the threshold
+        max_jump = np.fmax.reduce(change, initial=-np.inf)
+        min_drop = np.fmin.reduce(change, initial=np.inf)
+        n_jumps = np.count_nonzero(change > jump_threshold) if max_jump > jump_threshold else 0
+        n_drops = np.count_nonzero(change < -jump_threshold) if min_drop < -jump_threshold else 0
     
     # 1. Find sharp rising patterns (above threshold)
-    big_jumps = df[df['change'] > jump_threshold]
-    if len(big_jumps) > 0:
-        patterns.append(f"Sharp rises (>{jump_threshold}%): {len(big_jumps)} times")
-        max_jump = df['change'].max()
+    if n_jumps > 0:
+        patterns.append(f"Sharp rises (>{jump_threshold}%): {n_jumps} times")
         patterns.append(f"Max increase: {max_jump:.2f}%")
     
     # 2. Find sharp falling patterns
-    big_drops = df[df['change'] < -jump_threshold]
-    if len(big_drops) > 0:
-        patterns.append(f"Sharp drops (<-{jump_threshold}%): {len(big_drops)} times")
-        min_drop = df['change'].min()
+    if n_drops > 0:
+        patterns.append(f"Sharp drops (<-{jump_threshold}%): {n_drops} times")
         patterns.append(f"Max decrease: {min_drop:.2f}%")
     
-    # 3. Volatility patterns by time period
-    try:
-        time_vols = [
-            ['00:00', '03:00'],
-            ['03:00', '06:00'],
-            ['06:00', '09:00'],
-            ['09:00', '12:00'],
-            ['12:00', '15:00'],
-            ['15:00', '18:00'],
-            ['18:00', '21:00'],
-            ['21:00', '23:59'],
-        ]
-        for vol in time_vols:
-            period_vol = df.between_time(vol[0], vol[1])['change'].std()
-            patterns.append(f"Volatility ({vol[0]} - {vol[1]}): {period_vol:.2f}%")
+    # 3. Volatility patterns by time period (one grouped pass over 3-hour buckets)
+    if isinstance(df.index, pd.DatetimeIndex):
+        buckets = (df.index.hour.values // 3).astype(np.int8)
+        period_vols = pd.Series(change).groupby(buckets, sort=False).std()
+        period_vols = period_vols.reindex(range(len(TIME_PERIODS)))
+        for label, period_vol in zip(PERIOD_LABELS, period_vols):
+            patterns.append(f"{label}: {period_vol:.2f}%")
 
-    except:
-        # If time filtering fails, calculate overall volatility
-        overall_vol = df['change'].std()
+    else:
+        # Without a time index, calculate overall volatility
+        overall_vol = np.nanstd(change, ddof=1)
         patterns.append(f"Overall volatility: {overall_vol:.2f}%")
     
     # 4. Price trend
-    price_change = ((df['price'].iloc[-1] - df['price'].iloc[0]) / df['price'].iloc[0]) * 100
+    price_change = ((prices[-1] - prices[0]) / prices[0]) * 100
     patterns.append(f"Total price change: {price_change:.2f}%")
     
     return patterns
@@ -74,11 +115,7 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Load data
-    df = pd.read_csv(filename)
-    
-    # Convert timestamp
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.set_index('timestamp')
+    df = read_price_csv(filename, index_col='timestamp', dtype=PRICE_DTYPES)
     
     # Find patterns
     patterns = find_pattern(df, jump_threshold=2.0)
@@ -1,10 +1,88 @@
-import requests
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+from typing import Optional
+
+# orjson is optional; when installed it decodes the kline and ticker payloads
+try:
+    import orjson
+    loads_json = orjson.loads
+except ImportError:
+    import json
+    loads_json = json.loads
 
 
 BINANCE_KLINES_URL = 'https://api.binance.com/api/v3/klines'
 
+# Shared across calls so repeated backfills reuse the pooled TLS connection
+_SESSION = requests.Session()
+
+# Binance returns up to 1000 candles per request
+_LIMIT = 1000
+_MINUTE_MS = 60_000
+
+# Concurrent window requests; stays under the session's default pool size of 10
+_MAX_WORKERS = 8
+_MAX_RETRIES = 4
+
+# Request weights (see Binance REST docs): 1m klines with limit 1000, single-symbol ticker price,
+# and a ticker price request for a list of symbols
+KLINES_WEIGHT = 2
+TICKER_WEIGHT = 2
+TICKER_BATCH_WEIGHT = 4
+
+
+class WeightLimiter:
+    # Token bucket over Binance's per-minute request weight, corrected from the
+    # x-mbx-used-weight-1m header so other clients on the same IP are accounted for
+
+    def __init__(self, weight_per_minute: int = 1200):
+        self.capacity = float(weight_per_minute)
+        self._rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def acquire(self, weight: int):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = (weight - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def observe(self, headers):
+        used = headers.get('x-mbx-used-weight-1m')
+        if used is None:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, self.capacity - float(used))
+
+
+# One bucket per process: the limit is per IP, shared by backfills and ticker calls
+BINANCE_LIMITER = WeightLimiter()
+
+
+def _empty_prices() -> pd.DataFrame:
+    return pd.DataFrame({
+        'timestamp': pd.Series(dtype='datetime64[ns, UTC]'),
+        'price': pd.Series(dtype=np.float64),
+    })
+
 
 def _to_millis(dt: datetime) -> int:
 
@@ -16,59 +94,65 @@ def _to_millis(dt: datetime) -> int:
     return int(dt.timestamp() * 1000)
 
 
+def _fetch_window(s: requests.Session, symbol: str, window_start: int, window_end: int) -> list:
+    params = {
+        'symbol': symbol,
+        'interval': '1m',
+        'startTime': window_start,
+        'endTime': window_end,
+        'limit': _LIMIT,
+    }
+    for attempt in range(_MAX_RETRIES + 1):
+        BINANCE_LIMITER.acquire(KLINES_WEIGHT)
+        resp = s.get(BINANCE_KLINES_URL, params=params, timeout=15)
+        BINANCE_LIMITER.observe(resp.headers)
+        # Rate limited: honour Retry-After, else back off exponentially with jitter
+        if resp.status_code in (418, 429) and attempt < _MAX_RETRIES:
+            retry_after = resp.headers.get('Retry-After')
+            time.sleep(float(retry_after) if retry_after else min(60.0, 2 ** attempt + random.random()))
+            continue
+        resp.raise_for_status()
+        return loads_json(resp.content)
+    return []
+
+
 def fetch_minute_prices(
     symbol: str,
     start_time: datetime,
     end_time: datetime,
     session: Optional[requests.Session] = None,
-) -> List[Dict]:
+) -> pd.DataFrame:
 
     if start_time >= end_time:
-        return []
+        return _empty_prices()
 
-    s = session or requests.Session()
+    s = session or _SESSION
 
     start_ms = _to_millis(start_time)
     end_ms = _to_millis(end_time)
 
-    # Binance returns up to 1000 candles per request
-    limit = 1000
-    interval = '1m'
-
-    results: List[Dict] = []
-    current_start = start_ms
-
-    while current_start < end_ms:
-        params = {
-            'symbol': symbol,
-            'interval': interval,
-            'startTime': current_start,
-            'endTime': end_ms,
-            'limit': limit,
-        }
-
-        resp = s.get(BINANCE_KLINES_URL, params=params, timeout=15)
-        resp.raise_for_status()
-        klines = resp.json()
-
-        if not klines:
-            break
-
-        for k in klines:
-            open_time_ms = k[0]
-            close_price = float(k[4])
-            open_time_dt = datetime.fromtimestamp(open_time_ms / 1000.0, tz=timezone.utc)
-            # We align to the opening minute timestamp for consistency
-            results.append({'timestamp': open_time_dt, 'price': round(close_price, 2)})
-
-        # Advance to next batch (next candle after the last returned one)
-        last_open_time_ms = klines[-1][0]
-        current_start = last_open_time_ms + 60_000
-
-        # Safety: avoid infinite loops
-        if len(klines) < limit:
-            break
-
-    return results
-
+    # Each window spans at most one full batch, so all of them are known upfront
+    span_ms = _LIMIT * _MINUTE_MS
+    windows = [
+        (window_start, min(window_start + span_ms - 1, end_ms))
+        for window_start in range(start_ms, end_ms, span_ms)
+    ]
 
+    if len(windows) == 1:
+        batches = [_fetch_window(s, symbol, *windows[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(windows))) as pool:
+            # map keeps window order, so batches come back sorted by open time
+            batches = list(pool.map(lambda w: _fetch_window(s, symbol, *w), windows))
+
+    # Collect columns, then convert them in one vectorized step
+    open_times_ms = [k[0] for klines in batches for k in klines]
+    closes = [k[4] for klines in batches for k in klines]
+    if not open_times_ms:
+        return _empty_prices()
+
+    # We align to the opening minute timestamp for consistency
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.asarray(open_times_ms, dtype=np.int64), unit='ms', utc=True),
+        'price': np.round(np.asarray(closes, dtype=np.float64), 2),
+    })
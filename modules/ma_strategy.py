@@ -1,28 +1,127 @@
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
+# Moving-average kernels: the AOT-built extension if present (see modules/_kernels.py),
+# else numba's cached JIT when installed, else bottleneck or pandas rolling()
+try:
+  try:
+    from modules.ma_kernels import dual_rolling_mean as _dual_rolling_mean, ma_signals as _ma_signals
+  except ModuleNotFoundError:
+    from ma_kernels import dual_rolling_mean as _dual_rolling_mean, ma_signals as _ma_signals
+  _KERNELS = True
+except ImportError:
+  try:
+    from numba import njit
+    try:
+      from modules._kernels import _dual_rolling_mean, _ma_signals
+    except ModuleNotFoundError:
+      from _kernels import _dual_rolling_mean, _ma_signals
+    _dual_rolling_mean = njit(cache=True, nogil=True)(_dual_rolling_mean)
+    _ma_signals = njit(cache=True, nogil=True)(_ma_signals)
+    _KERNELS = True
+  except ImportError:
+    _KERNELS = False
+
+# bottleneck is optional; without the kernels its move_mean stands in for pandas rolling()
+try:
+  import bottleneck as _bn
+except ImportError:
+  _bn = None
+
+# Every value generate_signals can emit
+SIGNAL_CATEGORIES = ['HOLD', 'BUY', 'SELL']
+_BUY = SIGNAL_CATEGORIES.index('BUY')
+_SELL = SIGNAL_CATEGORIES.index('SELL')
+
+def _price_array(df):
+  # Unit-stride float64 prices for the kernels' f8[::1] signatures; a float64 column passes through uncopied
+  return np.ascontiguousarray(df['price'].to_numpy(dtype=np.float64))
+
+def _crossover_codes(short_ma, long_ma):
+  # Branchless: a crossover is a sign-bit flip between consecutive non-zero, non-NaN diffs,
+  # and the previous sign picks BUY (was negative) or SELL (was positive). Row 0 stays HOLD
+  diff = short_ma - long_ma
+  negative = np.signbit(diff).view(np.int8)
+  live = (np.abs(diff) > 0).view(np.int8)
+  flip = (negative[1:] ^ negative[:-1]) & live[1:] & live[:-1]
+
+  codes = np.zeros(len(diff), dtype=np.int8)
+  codes[1:] = flip * (_SELL + (_BUY - _SELL) * negative[:-1])
+  return codes
+
 class MovingAverageStrategy:
   def __init__(self, short_window=50, long_window=200):
     self.short_window = short_window
     self.long_window = long_window
+    self.reset()
+
+  def reset(self):
+    # Streaming state used by update()
+    self._short_prices = deque()
+    self._long_prices = deque()
+    self._short_sum = 0.0
+    self._long_sum = 0.0
+    self.short_ma = np.nan
+    self.long_ma = np.nan
+
+  def update(self, price):
+    # One new price: keep running window sums instead of re-rolling the whole history
+    price = float(price)
+    previous_short = self.short_ma
+    previous_long = self.long_ma
+
+    self._short_prices.append(price)
+    self._short_sum += price
+    if len(self._short_prices) > self.short_window:
+      self._short_sum -= self._short_prices.popleft()
+
+    self._long_prices.append(price)
+    self._long_sum += price
+    if len(self._long_prices) > self.long_window:
+      self._long_sum -= self._long_prices.popleft()
+
+    if len(self._short_prices) == self.short_window:
+      self.short_ma = self._short_sum / self.short_window
+    if len(self._long_prices) == self.long_window:
+      self.long_ma = self._long_sum / self.long_window
+
+    # Same crossover rule as generate_signals
+    if previous_short < previous_long and self.short_ma > self.long_ma:
+      return 'BUY'
+    elif previous_short > previous_long and self.short_ma < self.long_ma:
+      return 'SELL'
+    return 'HOLD'
 
   def calculate_moving_averages(self, df):
-    df['short_ma'] = df['price'].rolling(window=self.short_window).mean()
-    df['long_ma'] = df['price'].rolling(window=self.long_window).mean()
+    # Every backend averages float64 prices, so the persisted MAs do not depend on which is installed
+    if not _KERNELS:
+      if _bn is not None:
+        prices = df['price'].to_numpy(dtype=np.float64)
+        df['short_ma'] = _bn.move_mean(prices, self.short_window, min_count=self.short_window)
+        df['long_ma'] = _bn.move_mean(prices, self.long_window, min_count=self.long_window)
+        return df
+      df['short_ma'] = df['price'].rolling(window=self.short_window).mean()
+      df['long_ma'] = df['price'].rolling(window=self.long_window).mean()
+      return df
+    prices = _price_array(df)
+    # One pass over prices fills both windows
+    df['short_ma'], df['long_ma'] = _dual_rolling_mean(prices, self.short_window, self.long_window)
     return df
 
   def generate_signals(self, df):
-    signals = []
-    for i in range(len(df)):
-      current_short = df['short_ma'].iloc[i]
-      current_long = df['long_ma'].iloc[i]
-      previous_short = df['short_ma'].iloc[i-1]
-      previous_long = df['long_ma'].iloc[i-1]
-      if previous_short < previous_long and current_short > current_long:
-        signals.append('BUY')
-      elif previous_short > previous_long and current_short < current_long:
-        signals.append('SELL')
-      else:
-        signals.append('HOLD')
-    df['signal'] = signals
+    if 'short_ma' in df.columns and 'long_ma' in df.columns:
+      codes = _crossover_codes(df['short_ma'].to_numpy(dtype=np.float64),
+                               df['long_ma'].to_numpy(dtype=np.float64))
+    elif _KERNELS:
+      # No averages yet: fused kernel reads price once and emits averages and codes together
+      df['short_ma'], df['long_ma'], codes = _ma_signals(
+        _price_array(df), self.short_window, self.long_window)
+    else:
+      df = self.calculate_moving_averages(df)
+      codes = _crossover_codes(df['short_ma'].to_numpy(dtype=np.float64),
+                               df['long_ma'].to_numpy(dtype=np.float64))
+    # Categorical keeps one int8 code per row instead of a Python string
+    df['signal'] = pd.Categorical.from_codes(codes, categories=SIGNAL_CATEGORIES)
     return df
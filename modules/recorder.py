@@ -1,14 +1,18 @@
+import asyncio
+import json
 import logging
+import math
 import os
 import sys
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import pytz
 import requests
-import schedule
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 _MODULE_DIR = Path(__file__).resolve().parent
 _PROJECT_ROOT = _MODULE_DIR.parent
@@ -17,9 +21,11 @@ if _PROJECT_ROOT_STR not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT_STR)
 
 try:
-    from modules.historical import fetch_minute_prices
+    from modules.historical import BINANCE_LIMITER, TICKER_BATCH_WEIGHT, TICKER_WEIGHT, fetch_minute_prices, loads_json
+    from modules.storage import TIMESTAMP_FORMAT, read_last_timestamp, read_price_csv
 except ModuleNotFoundError:
-    from historical import fetch_minute_prices
+    from historical import BINANCE_LIMITER, TICKER_BATCH_WEIGHT, TICKER_WEIGHT, fetch_minute_prices, loads_json
+    from storage import TIMESTAMP_FORMAT, read_last_timestamp, read_price_csv
 
 logging.basicConfig(
     level=logging.WARNING,
@@ -28,8 +34,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Recorded timestamps are naive JST. Japan has no DST, so a fixed +09:00 offset
+# replaces pytz's transition-table lookups
+_JST = timezone(timedelta(hours=9))
+
+
+def _now_minute():
+    # Current JST minute as a naive datetime
+    return (datetime.now(timezone.utc) + timedelta(hours=9)).replace(second=0, microsecond=0, tzinfo=None)
+
+def _new_session(pool_maxsize=8):
+    # Keep-alive session; the default pool matches the concurrent kline windows in historical.py.
+    # Only 5xx is retried here: 418/429 go through BINANCE_LIMITER and the backoff in historical.py
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504]),
+    ))
+    return session
+
+
 class Recorder:
-    def __init__(self, symbol='BTCUSDT', interval=60, filename='../data/btc_prices.csv', verbose=True):
+    def __init__(self, symbol='BTCUSDT', interval=60, filename='../data/btc_prices.csv', verbose=True, session=None):
         self.symbol = symbol
         self.interval = interval  # seconds; use 60 for per-minute recording
         self.filename = filename
@@ -39,66 +65,72 @@ class Recorder:
         self.last_log_time = 0
         self.log_interval = 1800  # seconds
         self.verbose = verbose
+        # Keep-alive session for the per-tick ticker call and historical backfills;
+        # recorders for several symbols can pass one in to share its connection pool
+        self._session = session or _new_session()
+        # Last timestamp on disk; read from the file tail once, then kept up to date by the writers
+        self._last_ts = self._bootstrap_last_timestamp()
         
     def fetch_price(self):
         try:
-            response = requests.get(self.api_url + '?symbol=' + self.symbol, timeout=10)
+            BINANCE_LIMITER.acquire(TICKER_WEIGHT)
+            response = self._session.get(self.api_url, params={'symbol': self.symbol}, timeout=10)
+            BINANCE_LIMITER.observe(response.headers)
             response.raise_for_status()
-            data = response.json()
+            data = loads_json(response.content)
             if 'price' not in data:
                 raise ValueError("Price data not found in API response")
             price = float(data['price'])
             self.consecutive_failures = 0
             return price
         except Exception as e:
-            self.consecutive_failures += 1
-            if self.consecutive_failures >= self.max_consecutive_failures:
-                logger.error(f"API error (attempt {self.consecutive_failures}): {e}")
-            else:
-                logger.debug(f"API error (attempt {self.consecutive_failures}): {e}")
+            self._record_failure(e)
             return None
-    
-    def get_last_timestamp(self):
-        jst = pytz.timezone('Asia/Tokyo')
-        now_ts_jst = datetime.now(jst).replace(second=0, microsecond=0)
-        now_ts = now_ts_jst.replace(tzinfo=None)
 
+    def _record_failure(self, e):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.max_consecutive_failures:
+            logger.error(f"API error (attempt {self.consecutive_failures}): {e}")
+        else:
+            logger.debug(f"API error (attempt {self.consecutive_failures}): {e}")
+    
+    def _bootstrap_last_timestamp(self):
+        # Startup only: this process is the file's sole writer, so save_price keeps it current after this
         try:
             if os.path.exists(self.filename):
-                df = pd.read_csv(self.filename)
-                if not df.empty and 'timestamp' in df.columns:
-                    last_timestamp = pd.to_datetime(df['timestamp'].iloc[-1])
-                    return last_timestamp.replace(tzinfo=None)
+                return read_last_timestamp(self.filename)
         except Exception as e:
             logger.debug(f"Error reading last timestamp: {e}")
-        return now_ts
+        return None
+    
+    def get_last_timestamp(self):
+        # None until the first row is on disk
+        return self._last_ts
     
     def detect_missing_periods(self):
         if not os.path.exists(self.filename):
             return []
         
         try:
-            df = pd.read_csv(self.filename)
+            # Only the timestamps matter here, parsed inline by the reader
+            df = read_price_csv(self.filename, usecols=['timestamp'])
             if df.empty:
                 return []
             
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp')
+            # Epoch seconds as one contiguous int64 array; the recorder appends in order,
+            # so sorting is only needed when a diff comes out negative
+            timestamps = df['timestamp'].to_numpy()
+            seconds = timestamps.astype('datetime64[s]').astype(np.int64)
+            gaps = np.diff(seconds)
+            if (gaps < 0).any():
+                order = np.argsort(seconds, kind='stable')
+                timestamps, seconds = timestamps[order], seconds[order]
+                gaps = np.diff(seconds)
+            gap_idx = np.flatnonzero(gaps > int(self.interval * 1.5))
             
-            missing_periods = []
-            for i in range(len(df) - 1):
-                current_time = df.iloc[i]['timestamp']
-                next_time = df.iloc[i + 1]['timestamp']
-                expected_interval = timedelta(seconds=self.interval)
-                actual_interval = next_time - current_time
-                
-                if actual_interval > expected_interval * 1.5:
-                    missing_periods.append({
-                        'start': current_time,
-                        'end': next_time
-                    })
-            
-            return missing_periods
+            starts = pd.DatetimeIndex(timestamps[gap_idx])
+            ends = pd.DatetimeIndex(timestamps[gap_idx + 1])
+            return [{'start': start, 'end': end} for start, end in zip(starts, ends)]
         except Exception as e:
             logger.debug(f"Error detecting missing periods: {e}")
             return []
@@ -107,54 +139,82 @@ class Recorder:
     def fetch_historical_data(self, start_time, end_time):
         try:
             if start_time is None or end_time is None:
-                return []
+                return None
 
-            jst = pytz.timezone('Asia/Tokyo')
-            start_aware = jst.localize(start_time).astimezone(pytz.utc)
-            end_aware = jst.localize(end_time).astimezone(pytz.utc)
+            start_aware = start_time.replace(tzinfo=_JST).astimezone(timezone.utc)
+            end_aware = end_time.replace(tzinfo=_JST).astimezone(timezone.utc)
 
-            return fetch_minute_prices(self.symbol, start_aware, end_aware)
+            return fetch_minute_prices(self.symbol, start_aware, end_aware, session=self._session)
         except Exception as e:
             logger.error(f"Historical fetch error: {e}")
-            return []
+            return None
     
     def recover_missing_data(self):
         return
     
+    def _read_existing(self):
+        # Reconcile path only: timestamps parsed inline, prices kept at full float64 precision
+        return read_price_csv(self.filename, usecols=['timestamp', 'price'], dtype={'price': np.float64})
+    
+    @staticmethod
+    def _merge_into(existing_df, df_recovered):
+        # The file is sorted by construction, so recovered rows are placed by binary search
+        # instead of re-sorting the whole history; existing rows win on duplicate timestamps
+        if not existing_df['timestamp'].is_monotonic_increasing:
+            existing_df = existing_df.sort_values('timestamp', kind='stable')
+        existing_ts = existing_df['timestamp'].to_numpy(dtype='datetime64[ns]')
+        recovered_ts = df_recovered['timestamp'].to_numpy(dtype='datetime64[ns]')
+
+        pos = np.searchsorted(existing_ts, recovered_ts)
+        present = np.zeros(len(recovered_ts), dtype=bool)
+        inside = pos < len(existing_ts)
+        present[inside] = existing_ts[pos[inside]] == recovered_ts[inside]
+        new = ~present
+
+        return pd.DataFrame({
+            'timestamp': np.insert(existing_ts, pos[new], recovered_ts[new]),
+            'price': np.insert(existing_df['price'].to_numpy(dtype=np.float64), pos[new],
+                               df_recovered['price'].to_numpy(dtype=np.float64)[new]),
+        })
+
     def save_recovered_data(self, recovered_data):
         try:
             if not recovered_data:
                 return
             
-            df_recovered = pd.DataFrame(recovered_data)
-            
-            if os.path.exists(self.filename):
-                existing_df = pd.read_csv(self.filename)
-                existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'])
-                
-                combined_df = pd.concat([existing_df, df_recovered], ignore_index=True)
-                combined_df = combined_df.sort_values('timestamp').drop_duplicates(subset=['timestamp'])
-            else:
+            df_recovered = pd.DataFrame(recovered_data).sort_values('timestamp').drop_duplicates(subset=['timestamp'])
+
+            file_exists = os.path.exists(self.filename)
+            if not file_exists or (self._last_ts is not None and df_recovered['timestamp'].iloc[0] > self._last_ts):
+                # Everything recovered is newer than the file's tail: append, nothing to merge
                 combined_df = df_recovered
-            
-            combined_df.to_csv(self.filename, index=False)
+                combined_df.to_csv(self.filename, mode='a', header=not file_exists, index=False,
+                                   date_format=TIMESTAMP_FORMAT, float_format='%.2f')
+            else:
+                combined_df = self._merge_into(self._read_existing(), df_recovered)
+                # Write beside the file and swap it in, so tailing readers see a new inode
+                # instead of rows shifting under their byte offset
+                tmp_filename = f"{self.filename}.tmp"
+                combined_df.to_csv(tmp_filename, index=False, date_format=TIMESTAMP_FORMAT, float_format='%.2f')
+                os.replace(tmp_filename, self.filename)
+            self._last_ts = combined_df['timestamp'].max().to_pydatetime()
             if self.verbose:
                 logger.info(f"Saved {len(recovered_data)} points to {self.filename}")
             
         except Exception as e:
             logger.error(f"Save error: {e}")
     
-    def save_price(self):
-        price = self.fetch_price()
+    def save_price(self, price=None):
+        # price: already fetched for this tick (see fetch_prices); otherwise fetched here
+        if price is None:
+            price = self.fetch_price()
         if price is None:
             if self.consecutive_failures >= self.max_consecutive_failures:
                 logger.warning("Failed to fetch price data")
             return
 
         # Align to minute in JST
-        jst = pytz.timezone('Asia/Tokyo')
-        now_ts_jst = datetime.now(jst).replace(second=0, microsecond=0)
-        now_ts = now_ts_jst.replace(tzinfo=None)
+        now_ts = _now_minute()
 
         # Build list of rows to write (backfill gaps if any)
         rows = []
@@ -166,55 +226,51 @@ class Recorder:
         except Exception:
             pass
 
-        if last_timestamp is None:
-            # First record
-            rows.append({'timestamp': now_ts, 'price': round(price, 2)})
-        else:
+        if last_timestamp is not None:
             expected_next = (last_timestamp + timedelta(minutes=1)).replace(second=0, microsecond=0)
 
-            if expected_next > now_ts:
-                # System clock skew; still record current minute to avoid going backwards
-                logger.warning(f"Clock skew: last={last_timestamp}, expected_next={expected_next}, now={now_ts}")
-                rows.append({'timestamp': now_ts, 'price': round(price, 2)})
-            else:
-                # If there is a gap, fetch historical minute prices for missing minutes
-                if expected_next < now_ts:
-                    try:
-                        historical_rows = self.fetch_historical_data(expected_next, now_ts)
-                    except Exception:
-                        historical_rows = []
-
-                    if historical_rows:
-                        for r in historical_rows:
-                            try:
-                                ts_jst = r['timestamp'].astimezone(jst).replace(second=0, microsecond=0)
-                                ts_local = ts_jst.replace(tzinfo=None)
-                                if ts_local < now_ts:
-                                    rows.append({'timestamp': ts_local, 'price': round(float(r['price']), 2)})
-                            except Exception:
-                                continue
-                    # If historical fetch failed, skip backfill to avoid repeating price
-
-                # Always write the current minute value as the final row
-                rows.append({'timestamp': now_ts, 'price': round(price, 2)})
-
-        # Persist
-        try:
-            new_df = pd.DataFrame(rows)
-            if os.path.exists(self.filename):
-                existing_df = pd.read_csv(self.filename)
-                if not existing_df.empty:
-                    existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'])
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            else:
-                combined_df = new_df
+            # If there is a gap, fetch historical minute prices for missing minutes
+            if expected_next < now_ts:
+                try:
+                    historical_rows = self.fetch_historical_data(expected_next, now_ts)
+                except Exception:
+                    historical_rows = None
+
+                if historical_rows is not None and not historical_rows.empty:
+                    # UTC -> naive JST minutes as one column operation, then keep rows before now
+                    hist_ts = historical_rows['timestamp'].dt.tz_convert(_JST).dt.tz_localize(None).dt.floor('min')
+                    before_now = (hist_ts < now_ts).to_numpy()
+                    hist_prices = historical_rows['price'].to_numpy()[before_now].round(2)
+                    rows.extend(
+                        {'timestamp': ts_local, 'price': hist_price}
+                        for ts_local, hist_price in zip(hist_ts[before_now].tolist(), hist_prices.tolist())
+                    )
+                # If historical fetch failed, skip backfill to avoid repeating price
 
-            # Enforce types: timestamp as datetime and price as numeric (float)
-            combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'])
-            combined_df['price'] = pd.to_numeric(combined_df['price'], errors='coerce').round(2)
-            combined_df = combined_df.sort_values('timestamp').drop_duplicates(subset=['timestamp'])
+        # Always write the current minute value as the final row
+        rows.append({'timestamp': now_ts, 'price': round(price, 2)})
 
-            combined_df.to_csv(self.filename, index=False)
+        # The file stays monotonic by construction: anything at or before the last written
+        # minute is already on disk (a sort/dedup would have kept the existing row anyway)
+        if last_timestamp is not None:
+            rows = [r for r in rows if r['timestamp'] > last_timestamp]
+            if not rows:
+                if now_ts < last_timestamp:
+                    logger.warning(f"Clock went backwards: last={last_timestamp}, now={now_ts}")
+                else:
+                    # Restarted within the minute already on disk
+                    logger.debug(f"Minute {now_ts} already recorded")
+                return
+
+        # Persist: append as text, no read/concat/sort/dedup of the existing file
+        try:
+            file_exists = os.path.exists(self.filename)
+            lines = ''.join(f"{r['timestamp'].strftime(TIMESTAMP_FORMAT)},{r['price']:.2f}\n" for r in rows)
+            with open(self.filename, 'a') as f:
+                if not file_exists:
+                    f.write('timestamp,price\n')
+                f.write(lines)
+            self._last_ts = rows[-1]['timestamp']
         except Exception as e:
             logger.error(f"Save error: {e}")
             return
@@ -226,21 +282,102 @@ class Recorder:
             self.last_log_time = current_time
     
     def start(self):
-        # Initial write aligns to current minute; subsequent writes every interval
+        # Initial write aligns to current minute; subsequent writes on each interval boundary
         self.save_price()
-        schedule.every(self.interval).seconds.do(self.save_price)
         logger.info(f"Started {self.symbol} every {self.interval}s → {self.filename}")
         
+        # Sleep straight to the next absolute deadline instead of polling every second
+        next_deadline = math.ceil(time.time() / self.interval) * self.interval
         while True:
             try:
-                schedule.run_pending()
-                time.sleep(1)
+                time.sleep(max(0.0, next_deadline - time.time()))
+                self.save_price()
             except KeyboardInterrupt:
                 logger.info("Stopped by user")
                 break
             except Exception as e:
                 logger.error(f"Main loop error: {e}")
                 time.sleep(5)
+            # Skip deadlines missed by a slow tick rather than firing them back to back
+            next_deadline = max(next_deadline + self.interval,
+                                math.ceil(time.time() / self.interval) * self.interval)
+
+    async def _tick(self, limit, price=None):
+        # Blocking HTTP and file I/O run in a worker thread, at most limit's worth at once
+        async with limit:
+            await asyncio.to_thread(self.save_price, price)
+
+
+def fetch_prices(recorders):
+    # One ticker request for every recorder's symbol instead of one request each;
+    # returns {symbol: price} and counts a failure against recorders left without a price
+    head = recorders[0]
+    symbols = sorted({recorder.symbol for recorder in recorders})
+    prices = {}
+    error = None
+    try:
+        BINANCE_LIMITER.acquire(TICKER_BATCH_WEIGHT)
+        response = head._session.get(head.api_url, params={'symbols': json.dumps(symbols, separators=(',', ':'))},
+                                     timeout=10)
+        BINANCE_LIMITER.observe(response.headers)
+        response.raise_for_status()
+        prices = {item['symbol']: float(item['price']) for item in loads_json(response.content)}
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        if status is not None and 400 <= status < 500 and status not in (418, 429):
+            # One invalid or delisted symbol rejects the whole list; ask per symbol so only
+            # its own recorder fails (fetch_price keeps each failure count)
+            prices = {}
+            for recorder in recorders:
+                price = recorder.fetch_price()
+                if price is not None:
+                    prices[recorder.symbol] = price
+            return prices
+        error = e
+    except Exception as e:
+        error = e
+
+    for recorder in recorders:
+        if recorder.symbol in prices:
+            recorder.consecutive_failures = 0
+        else:
+            recorder._record_failure(error or ValueError(f"Price data not found for {recorder.symbol}"))
+    return prices
+
+
+async def _run_batch(recorders, limit):
+    # Deadline loop shared by recorders with the same interval: one ticker request per tick,
+    # then each recorder writes its own file
+    interval = recorders[0].interval
+    next_deadline = time.time()
+    while True:
+        await asyncio.sleep(max(0.0, next_deadline - time.time()))
+        try:
+            prices = await asyncio.to_thread(fetch_prices, recorders)
+            await asyncio.gather(*(recorder._tick(limit, prices[recorder.symbol])
+                                   for recorder in recorders if recorder.symbol in prices))
+        except Exception as e:
+            logger.error(f"Main loop error: {e}")
+        next_deadline = max(next_deadline + interval, math.ceil(time.time() / interval) * interval)
+
+
+def record_symbols(recorders, max_concurrent=16):
+    # One event loop for any number of recorders instead of one sleeping thread each.
+    # Recorders sharing an interval share one ticker request per tick; their file writes
+    # overlap, up to max_concurrent at a time
+    async def _main():
+        limit = asyncio.Semaphore(max_concurrent)
+        by_interval = {}
+        for recorder in recorders:
+            by_interval.setdefault(recorder.interval, []).append(recorder)
+        for group in by_interval.values():
+            logger.info(f"Started {', '.join(r.symbol for r in group)} every {group[0].interval}s")
+        await asyncio.gather(*(_run_batch(group, limit) for group in by_interval.values()))
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        logger.info("Stopped by user")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,203 @@
+import io
+import mmap
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# pyarrow is optional; when installed its multi-threaded CSV parser is used
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+# Format written by Recorder (see recorder.save_price)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Half-width prices for read-only analysis (detector, analyzer, live monitor). float32 keeps
+# ~7 significant digits, so cents are lost from 131072 up; paths that write prices back out
+# must read float64
+PRICE_DTYPES = {'price': np.float32}
+
+# Header line per CSV path, read once by read_csv_tail
+_HEADER_CACHE = {}
+
+
+def read_price_csv(path, time_column: str = 'timestamp', index_col=None, **kwargs) -> pd.DataFrame:
+
+    # Let the parser convert the time column inline instead of a second to_datetime pass
+    kwargs.setdefault('engine', CSV_ENGINE)
+    if kwargs['engine'] != 'pyarrow':
+        # The C parser builds the index directly, skipping set_index's rebuild of the frame
+        return pd.read_csv(path, parse_dates=[time_column], date_format=TIMESTAMP_FORMAT,
+                           index_col=index_col, **kwargs)
+    df = pd.read_csv(path, parse_dates=[time_column], date_format=TIMESTAMP_FORMAT, **kwargs)
+
+    # Set the index afterwards: the pyarrow engine mishandles index_col combined with dtype
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+
+def _read_header(path) -> bytes:
+    header = _HEADER_CACHE.get(path)
+    if header is None:
+        with open(path, 'rb') as f:
+            header = f.readline()
+        # Don't cache a header that is still being written
+        if header.endswith(b'\n'):
+            _HEADER_CACHE[path] = header
+    return header
+
+
+def _tail_offset(f, header_len: int, size: int, n_lines: int) -> int:
+
+    # Walk back over n_lines row boundaries in a read-only mapping, so only the pages
+    # near the end of the file are touched; the final newline is ignored
+    if size <= header_len:
+        return header_len
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = size - 1 if mm[size - 1:size] == b'\n' else size
+        for _ in range(n_lines):
+            pos = mm.rfind(b'\n', header_len, pos)
+            if pos == -1:
+                return header_len
+        return pos + 1
+
+
+def read_csv_tail(path, n_lines: int, time_column: str = 'timestamp', **kwargs) -> pd.DataFrame:
+
+    header = _read_header(path)
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(_tail_offset(f, len(header), size, n_lines))
+        body = f.read()
+    return read_price_csv(io.BytesIO(header + body), time_column=time_column, **kwargs)
+
+
+def read_last_timestamp(path, time_column: str = 'timestamp'):
+
+    # Seek to the last row and parse just its time field; None for a header-only file
+    header = _read_header(path)
+    time_index = header.decode().strip().split(',').index(time_column)
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(_tail_offset(f, len(header), size, 1))
+        line = f.readline()
+    if not line.strip():
+        return None
+    return datetime.strptime(line.split(b',')[time_index].decode().strip(), TIMESTAMP_FORMAT)
+
+
+def _line_start(f, header_len: int, pos: int) -> int:
+    # First row boundary at or after pos
+    if pos <= header_len:
+        return header_len
+    f.seek(pos - 1)
+    f.readline()
+    return f.tell()
+
+
+def _since_offset(f, header_len: int, size: int, cutoff, time_index: int) -> int:
+
+    # Rows are appended in time order, so bisect on byte offsets for the first row >= cutoff
+    lo, hi = header_len, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = _line_start(f, header_len, mid)
+        f.seek(start)
+        line = f.readline()
+        try:
+            at_or_after = datetime.strptime(line.split(b',')[time_index].decode().strip(), TIMESTAMP_FORMAT) >= cutoff
+        except (IndexError, ValueError):
+            # EOF or a row still being written
+            at_or_after = True
+        if at_or_after:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_start(f, header_len, lo)
+
+
+def read_csv_since(path, cutoff, time_column: str = 'timestamp', **kwargs) -> pd.DataFrame:
+
+    header = _read_header(path)
+    time_index = header.decode().strip().split(',').index(time_column)
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(_since_offset(f, len(header), size, cutoff, time_index))
+        body = f.read()
+    return read_price_csv(io.BytesIO(header + body), time_column=time_column, **kwargs)
+
+
+class TailingCsvReader:
+    def __init__(self, path, max_rows: int, time_column: str = 'timestamp', **kwargs):
+        self.path = path
+        self.max_rows = max_rows
+        self.time_column = time_column
+        self.read_kwargs = kwargs
+        self.restarted = False  # True when the last read_new() started over from the tail
+        self._offset = None
+        self._df = None
+        self._ino = None  # inode read from; a rewritten-and-replaced file gets a new one
+        self._stat = None  # (inode, size, mtime_ns) after the last read; unchanged means nothing new
+
+    def read_new(self) -> pd.DataFrame:
+        # Idle ticks cost one stat() instead of an open, seek and empty parse
+        st = os.stat(self.path)
+        stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stat == self._stat:
+            self.restarted = False
+            return self.frame.iloc[:0]
+
+        header = _read_header(self.path)
+        columns = header.decode().strip().split(',')
+
+        with open(self.path, 'rb') as f:
+            ino = os.fstat(f.fileno()).st_ino
+            size = f.seek(0, os.SEEK_END)
+            self.restarted = self._offset is None or ino != self._ino or size < self._offset
+            if self.restarted:
+                # First read, the file was replaced (Recorder.save_recovered_data) or truncated:
+                # the old offset means nothing any more, so start over from the tail
+                self._offset = _tail_offset(f, len(header), size, self.max_rows)
+                self._df = None
+                self._ino = ino
+            f.seek(self._offset)
+            delta = f.read(size - self._offset)
+
+        # Leave a partially written last row for the next call
+        end = delta.rfind(b'\n') + 1
+        if not end:
+            self._stat = stat
+            return pd.DataFrame(columns=columns)
+
+        new_rows = read_price_csv(
+            io.BytesIO(delta[:end]),
+            time_column=self.time_column,
+            header=None,
+            names=columns,
+            **self.read_kwargs,
+        )
+        self._offset += end
+        if self._df is None:
+            self._df = new_rows
+        else:
+            self._df = pd.concat([self._df, new_rows], ignore_index=True).tail(self.max_rows)
+        # Only now is this state consumed; a failed parse above is retried on the next call
+        self._stat = stat
+        return new_rows
+
+    def read(self) -> pd.DataFrame:
+        self.read_new()
+        return self.frame
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        # Last max_rows rows seen so far
+        if self._df is None:
+            return pd.DataFrame(columns=_read_header(self.path).decode().strip().split(','))
+        return self._df
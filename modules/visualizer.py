@@ -1,47 +1,84 @@
-import matplotlib.pyplot as plt
 import os
 
+import matplotlib
+# Headless runs only save the PNG, so skip the GUI backend unless a display is attached
+if not os.environ.get('DISPLAY'):
+  matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
 import dotenv
 dotenv.load_dotenv()
 
+try:
+  from modules.ma_strategy import SIGNAL_CATEGORIES
+except ModuleNotFoundError:
+  from ma_strategy import SIGNAL_CATEGORIES
+
+# Points per plotted line; a 12-inch figure has far fewer pixels than a minute history has rows
+PLOT_POINTS = 2000
+
+def _downsample(values, target=PLOT_POINTS):
+  # Positions of each bucket's min and max, so spikes survive; NaN-only buckets fall back to their first row
+  n = len(values)
+  if n <= target:
+    return np.arange(n)
+  size = -(-n // (target // 2))
+  padded = np.full(-(-n // size) * size, np.nan)
+  padded[:n] = values
+  rows = padded.reshape(-1, size)
+  offsets = np.arange(rows.shape[0])[:, None] * size
+  lows = np.where(np.isnan(rows), np.inf, rows).argmin(axis=1)[:, None]
+  highs = np.where(np.isnan(rows), -np.inf, rows).argmax(axis=1)[:, None]
+  keep = (offsets + np.hstack([lows, highs])).ravel()
+  return np.unique(np.minimum(keep, n - 1))
+
+def _plot_line(ax, df, column, **kwargs):
+  idx = _downsample(df[column].to_numpy(dtype=np.float64))
+  ax.plot(df.index[idx], df[column].to_numpy()[idx], **kwargs)
+
 def plot_strategy_results(df, output_image):
   # Use 'price' if available, otherwise 'close'
   price_col = 'price' if 'price' in df.columns else 'close'
 
   short_window = os.getenv('SHORT_WINDOW', 50)  
   long_window = os.getenv('LONG_WINDOW', 200)
-  
-  plt.figure(figsize=(12, 8))
 
-  plt.subplot(2, 1, 1)
-  plt.plot(df[price_col], label="Price", alpha=0.5)
-  plt.plot(df['short_ma'], label=f'MA{short_window}', alpha=0.8)
-  plt.plot(df['long_ma'], label=f'MA{long_window}', alpha=0.8)
+  fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+
+  _plot_line(ax1, df, price_col, label="Price", alpha=0.5)
+  _plot_line(ax1, df, 'short_ma', label=f'MA{short_window}', alpha=0.8)
+  _plot_line(ax1, df, 'long_ma', label=f'MA{long_window}', alpha=0.8)
 
-  buy_signals = df[df['signal'] == 'BUY']
-  sell_signals = df[df['signal'] == 'SELL']
-  plt.scatter(buy_signals.index, buy_signals[price_col], 
+  # Positions from int8 category codes instead of comparing Python strings
+  codes = pd.Categorical(df['signal'], categories=SIGNAL_CATEGORIES).codes
+  buy_idx = np.flatnonzero(codes == SIGNAL_CATEGORIES.index('BUY'))
+  sell_idx = np.flatnonzero(codes == SIGNAL_CATEGORIES.index('SELL'))
+  prices = df[price_col].to_numpy()
+  ax1.scatter(df.index[buy_idx], prices[buy_idx], 
               color='red', marker='^', label='BUY', s=100)
-  plt.scatter(sell_signals.index, sell_signals[price_col], 
+  ax1.scatter(df.index[sell_idx], prices[sell_idx], 
               color='blue', marker='v', label='SELL', s=100)
   
-  plt.xlabel('Time')
-  plt.ylabel('Price')
-  plt.title('Price Chart with Moving Averages and Signals')
-  plt.legend()
-  plt.grid(True, alpha=0.3)
+  ax1.set_xlabel('Time')
+  ax1.set_ylabel('Price')
+  ax1.set_title('Price Chart with Moving Averages and Signals')
+  ax1.legend()
+  ax1.grid(True, alpha=0.3)
   
-  plt.subplot(2, 1, 2)
-  plt.plot(df['portfolio_value'], label='Portfolio Value', color='green')
-  plt.xlabel('Time')
-  plt.ylabel('Portfolio Value ($)')
-  plt.title('Portfolio Value Over Time')
-  plt.legend()
-  plt.grid(True, alpha=0.3)
+  _plot_line(ax2, df, 'portfolio_value', label='Portfolio Value', color='green')
+  ax2.set_xlabel('Time')
+  ax2.set_ylabel('Portfolio Value ($)')
+  ax2.set_title('Portfolio Value Over Time')
+  ax2.legend()
+  ax2.grid(True, alpha=0.3)
 
   dirname = os.path.dirname(__file__)
   filename = os.path.join(os.path.dirname(dirname), output_image)
 
-  plt.tight_layout()
-  plt.savefig(filename)
-  plt.show()
\ No newline at end of file
+  fig.tight_layout()
+  fig.savefig(filename)
+  if os.environ.get('DISPLAY'):
+    plt.show()
+  plt.close(fig)
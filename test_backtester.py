@@ -1,26 +1,30 @@
 import os
 import sys
-import pandas as pd
+from pathlib import Path
 
 import dotenv
 dotenv.load_dotenv()
 
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / 'data'
+
 # Add modules directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+sys.path.append(str(BASE_DIR / 'modules'))
 from modules.backtester import Backtester
 from modules.ma_strategy import MovingAverageStrategy
+from modules.storage import read_price_csv
 
 
 def main():
 	# Read MA signals CSV file (generated by test_ma_strategy.py)
-	data_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_signals.csv')
-	if not os.path.exists(data_file):
+	data_file = DATA_DIR / 'btc_signals.csv'
+	if not data_file.exists():
 		print(f"Error: MA signals file not found: {data_file}")
 		print("Please run test_ma_strategy.py first to generate the signals file.")
 		return
 	
-	df = pd.read_csv(data_file)
-	df['timestamp'] = pd.to_datetime(df['timestamp'])
+	# Timestamps parsed inline; signal read straight into a Categorical
+	df = read_price_csv(data_file, dtype={'signal': 'category'})
 	
 	# Generate signals if not already present
 	if 'signal' not in df.columns:
@@ -36,20 +40,14 @@ def main():
 	backtester = Backtester(initial_capital=1000000)
 	performance = backtester.run_backtest(df)
 	
-	# Add portfolio value and daily return to dataframe
-	results_df = df.copy()
-	results_df['portfolio_value'] = backtester.portfolio_value
-	results_df['daily_return'] = results_df['portfolio_value'].pct_change() * 100
+	# Add portfolio value and daily return to dataframe; df is local, so no copy is needed
+	df['portfolio_value'] = backtester.portfolio_value
+	df['daily_return'] = df['portfolio_value'].pct_change() * 100
 	
 	# Save results to CSV file
-	output_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_backtest.csv')
-
-	results_df['price'] = results_df['price'].apply(lambda x: f'{float(x):.2f}')
-	results_df['short_ma'] = results_df['short_ma'].apply(lambda x: f'{float(x):.2f}')
-	results_df['long_ma'] = results_df['long_ma'].apply(lambda x: f'{float(x):.2f}')
-	results_df['portfolio_value'] = results_df['portfolio_value'].apply(lambda x: f'{float(x):.2f}')
-	results_df['daily_return'] = results_df['daily_return'].apply(lambda x: f'{float(x):.2f}')
-	results_df.to_csv(output_file, index=False)
+	output_file = DATA_DIR / 'btc_backtest.csv'
+
+	df.to_csv(output_file, index=False, float_format='%.2f', na_rep='nan')
 	
 	print(f'Backtest completed and saved to: {output_file}')
 	print(f'Total return: {performance["total_return"]:.2f}%')
@@ -1,17 +1,15 @@
 #!/usr/bin/env python3
 """Test script for pattern detection"""
 
-import pandas as pd
 from modules.detector import find_pattern
+from modules.storage import PRICE_DTYPES, read_price_csv
 
 def test_find_pattern():
     """Test the find_pattern function with different thresholds"""
     
     # Load data
     print("Loading BTC price data...")
-    df = pd.read_csv('data/btc_prices.csv')
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.set_index('timestamp')
+    df = read_price_csv('data/btc_prices.csv', index_col='timestamp', dtype=PRICE_DTYPES)
     
     print(f"Loaded {len(df)} records")
     print(f"Date range: {df.index[0]} to {df.index[-1]}")
@@ -1,27 +1,33 @@
 import os
 import sys
-import pandas as pd
+from pathlib import Path
 
 import dotenv
 dotenv.load_dotenv()
 
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / 'data'
+
 # Make sure we can import from modules/
-sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+sys.path.append(str(BASE_DIR / 'modules'))
 from modules.ma_strategy import MovingAverageStrategy
+from modules.storage import read_price_csv
 
 
 def main():
   # Read input CSV file
-  csv_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_prices.csv')
-  if not os.path.exists(csv_file):
+  csv_file = DATA_DIR / 'btc_prices.csv'
+  if not csv_file.exists():
     print(f"Error: Missing data file: {csv_file}")
     return
   
-  df = pd.read_csv(csv_file)
+  # Typed single-pass parse: timestamps inline, float64 prices since they are written back out
+  df = read_price_csv(csv_file, usecols=['timestamp', 'price'], dtype={'price': 'float64'})
   
-  # Ensure timestamp is sorted
-  df['timestamp'] = pd.to_datetime(df['timestamp'])
-  df = df.sort_values('timestamp').reset_index(drop=True)
+  # Recorder output is already in time order; only sort when it isn't
+  if not df['timestamp'].is_monotonic_increasing:
+    # Columns are assigned positionally and the CSV is written without an index, so no relabel
+    df = df.sort_values('timestamp')
   
   # Calculate moving averages and generate signals
   short_window = os.getenv('SHORT_WINDOW', 50)
@@ -29,16 +35,12 @@ def main():
   print(f'Using short window: {short_window}, long window: {long_window}')
 
   strategy = MovingAverageStrategy(short_window=int(short_window), long_window=int(long_window))
-  df = strategy.calculate_moving_averages(df)
+  # generate_signals fills both averages and the signal; with the kernels that is one pass over price
   df = strategy.generate_signals(df)
   
   # Save results to CSV file
-  output_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_signals.csv')
-  results_df = df.copy()
-  results_df['price'] = results_df['price'].apply(lambda x: f'{float(x):.2f}')
-  results_df['short_ma'] = results_df['short_ma'].apply(lambda x: f'{float(x):.2f}')
-  results_df['long_ma'] = results_df['long_ma'].apply(lambda x: f'{float(x):.2f}')
-  results_df.to_csv(output_file, index=False)
+  output_file = DATA_DIR / 'btc_signals.csv'
+  df.to_csv(output_file, index=False, float_format='%.2f', na_rep='nan')
   print(f'Moving averages and signals calculated and saved to: {output_file}')
   print(f'Total rows: {len(df)}')
 
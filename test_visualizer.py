@@ -3,25 +3,27 @@
 
 import os
 import sys
-import pandas as pd
+from pathlib import Path
 
 import dotenv
 dotenv.load_dotenv()
 
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / 'data'
+
 # Add modules directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+sys.path.append(str(BASE_DIR / 'modules'))
+from modules.storage import read_price_csv
 from modules.visualizer import plot_strategy_results
 
 
 def main():
   # Check if backtest results exist, otherwise use MA signals
-  backtest_file = os.path.join(os.path.dirname(__file__), 'data', 'btc_backtest.csv')
+  backtest_file = DATA_DIR / 'btc_backtest.csv'
   
-  if os.path.exists(backtest_file):
+  if backtest_file.exists():
     print(f"Using backtest results: {backtest_file}")
-    df = pd.read_csv(backtest_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
+    df = read_price_csv(backtest_file, index_col='timestamp', dtype={'signal': 'category'})
   
   # Check if we have price data
   if 'price' not in df.columns and 'close' not in df.columns: